@@ -4,11 +4,35 @@ from mep_meetings.scraper.utils import extract_articles_to_dataframe
 import streamlit as st
 import asyncio
 import pandas as pd
+import sys
 from io import BytesIO
+from loguru import logger
+
+try:
+    import uvloop
+except ImportError:  # uvloop is not available on Windows
+    uvloop = None
 
 st.set_page_config(layout="wide")
 
 
+@st.cache_resource
+def configure_logging() -> None:
+    """
+    Swap loguru's default sink for a WARNING-level one writing from a background thread.
+    Cached, so it runs once per process rather than on every Streamlit rerun.
+    """
+    # Only the default handler is removed, so sinks installed elsewhere are kept
+    try:
+        logger.remove(0)
+    except ValueError:
+        pass  # Already removed by whoever configured logging before us
+    logger.add(sys.stderr, level="WARNING", enqueue=True)
+
+
+configure_logging()
+
+
 async def scrape_meetings(url: str, pages: int):
     fetcher = EuroparlMeetingFetcher(url)
     await fetcher.run_async(pages=pages)
@@ -42,7 +66,9 @@ with col1:
 
 if scrape_button and url:
     with st.spinner("Scraping..."):
-        articles = asyncio.run(scrape_meetings(url, pages))
+        # uvloop's event loop is faster for many concurrent requests; fall back to asyncio's where it is missing
+        run = uvloop.run if uvloop is not None else asyncio.run
+        articles = run(scrape_meetings(url, pages))
         df = extract_articles_to_dataframe(articles)
         st.success("Scraping completed!")
 
@@ -1,21 +1,76 @@
 # %%
 from abc import ABC, abstractmethod
+from itertools import chain
+import asyncio
+import codecs
+import copy
 import httpx
 from asyncio import Semaphore
-import pandas as pd
 from tqdm import tqdm
-from tqdm.asyncio import tqdm_asyncio
-from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser, LexborNode
 import urllib
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
 from loguru import logger
-from tenacity import retry, stop_after_attempt, wait_fixed
+import random
 import re
 
 
+_MEMBER_ID_RE = re.compile(r"/(\d+)/")
+_PAGE_RE = re.compile(r"page=(\d+)")
+
+
+def _is_utf8(charset: str) -> bool:
+    """
+    Check whether a charset name refers to UTF-8, under any of its aliases.
+
+    :param charset: The charset name, e.g. from a Content-Type header.
+    :return: True if the charset is UTF-8, False otherwise or if it is unknown.
+    """
+    try:
+        return codecs.lookup(charset).name == "utf-8"
+    except LookupError:
+        return False
+
+
+def _first_text(
+    node: LexborNode,
+    selector: str,
+    attribute: Optional[str] = None,
+    clean: bool = False,
+) -> Optional[str]:
+    """
+    Return the text (or an attribute) of the first element matching a CSS selector under a node.
+    Missing fields are expected on meeting pages, so no exception is raised and nothing is logged.
+
+    :param node: The element to search under.
+    :param selector: The CSS selector to match.
+    :param attribute: The attribute to read instead of the text content. Optional.
+    :param clean: Whether to strip the text and join its lines with " - ".
+    :return: The text of the first match, or None if nothing matched.
+    """
+    match = node.css_first(selector)
+    if match is None:
+        return None
+    text = match.attributes.get(attribute) if attribute else match.text()
+    if clean and text is not None:
+        text = text.strip().replace("\n", " - ")
+    return text
+
+
+# Returned by fetch_and_parse_article for the blank body a paged listing sends past its last page
+_END_OF_LISTING = object()
+
+
 class BaseFetcher(ABC):  # Inherit from ABC (Abstract Base Class)
+    # Set to True for paged listings that answer with a blank body past their last page
+    stop_on_empty_page: bool = False
+
     def __init__(
-        self, base_url: str = None, timeout: int = 10, max_connections: int = 3
+        self,
+        base_url: str = None,
+        timeout: int = 10,
+        max_connections: int = 3,
+        show_progress: bool = True,
     ) -> None:
         """
         Initialize the BaseFetcher with a base URL, timeout, and maximum connections.
@@ -23,12 +78,44 @@ class BaseFetcher(ABC):  # Inherit from ABC (Abstract Base Class)
         :param base_url: The base URL for fetching articles. Optional, the child class can circumvent this.
         :param timeout: The timeout for HTTP requests. Default is 10 seconds.
         :param max_connections: The maximum number of concurrent connections. Default is 3.
+        :param show_progress: Whether to display a progress bar. Pass False for library or CI usage. Default is True.
         """
         self.base_url = base_url
         self.article_links: List[str] = []
         self.articles: List[Dict[str, Optional[str]]] = []
         self.timeout = timeout
+        self.max_connections = max_connections
+        self.show_progress = show_progress
         self.semaphore = Semaphore(max_connections)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def get_client(self) -> httpx.AsyncClient:
+        """
+        Return the shared HTTP client, creating it on first use.
+        A single pooled client keeps connections (and HTTP/2 streams) alive across pages,
+        instead of paying a new TCP+TLS handshake for every request.
+
+        :return: The shared asynchronous HTTP client.
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=30,
+                ),
+                timeout=httpx.Timeout(self.timeout, connect=5),
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        """
+        Close the shared HTTP client, if one was created.
+        """
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     @abstractmethod
     def construct_or_retrieve_links(self, page: int) -> None:
@@ -40,60 +127,169 @@ class BaseFetcher(ABC):  # Inherit from ABC (Abstract Base Class)
         """
         pass
 
+    async def construct_or_retrieve_links_async(self, page: int) -> List[str]:
+        """
+        Asynchronous variant of construct_or_retrieve_links, used by construct_or_retrieve_all_links.
+        It returns the links of the page instead of storing them, so pages can be retrieved concurrently
+        and still be collected in page order.
+        By default the synchronous method runs in a worker thread, on a shallow copy of the fetcher with
+        its own article_links list, so concurrent pages never append to a shared list.
+        Subclasses that hit the network to retrieve links should override this with a native coroutine using get_client().
+
+        :param page: The page number to retrieve links from.
+        :return: The article links of the page, as a flat list of URLs.
+        """
+        page_fetcher = copy.copy(self)
+        page_fetcher.article_links = []
+        await asyncio.to_thread(page_fetcher.construct_or_retrieve_links, page)
+        return page_fetcher.article_links
+
+    async def construct_or_retrieve_all_links(self, pages: int) -> None:
+        """
+        Retrieve article links from every page, concurrently.
+        Subclasses that can build the whole link list in one go may override this.
+
+        :param pages: The number of pages to retrieve links from.
+        """
+
+        async def retrieve_links(page: int) -> List[str]:
+            try:
+                return await self.construct_or_retrieve_links_async(page)
+            except Exception as e:
+                logger.warning("Failed to retrieve links from page {}: {}", page, e)
+                raise e
+
+        # Pages may finish in any order, but gather returns their links in page order
+        links_per_page = await asyncio.gather(
+            *[retrieve_links(page) for page in range(1, pages + 1)]
+        )
+        self.article_links = list(chain.from_iterable(links_per_page))
+
     @abstractmethod
     def parse_article(
-        self, article_html: str, article_url: str
-    ) -> Optional[Dict[str, Optional[str]]]:
+        self, article_html: Union[bytes, str], article_url: str
+    ) -> Optional[List[Dict[str, Optional[str]]]]:
         """
         Parse a single article's HTML.
 
-        :param article_html: The HTML content of the article.
+        :param article_html: The HTML content of the article: raw UTF-8 bytes, or text already decoded by fetch_article.
         :param article_url: The URL of the article.
-        :return: A dictionary containing parsed article data.
+        :return: A list of dictionaries containing parsed article data.
+            An empty list if the page holds no articles, None if it could not be parsed.
         """
         pass
 
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(2))
     async def fetch_article(
         self, client: httpx.AsyncClient, article_url: str
-    ) -> Optional[str]:
+    ) -> Optional[Union[bytes, str]]:
         """
         Fetch a single article with retry logic.
+        Failed attempts are retried with exponential backoff and jitter, so a burst of failures does not retry in lockstep.
 
         :param client: The HTTP client to use for fetching.
         :param article_url: The URL of the article to fetch.
-        :return: The HTML content of the article, or None if fetching failed.
+        :return: The raw HTML content of the article, undecoded so the parser reads the bytes directly.
+            Pages served in a charset other than UTF-8 are decoded to text instead.
+        :raises httpx.HTTPError: If the last attempt fails.
         """
-        try:
-            response = await client.get(article_url, timeout=self.timeout)
-            response.raise_for_status()
-            return response.text
-        except Exception as e:
-            logger.warning(f"Failed to fetch {article_url}: {e}")
-            logger.warning(f"Retrying {article_url}...")
-            raise e  # Raise exception to trigger retry
+        for attempt in range(3):
+            try:
+                response = await client.get(article_url)
+                response.raise_for_status()
+                # The parser reads bytes as UTF-8, so pages declared in another charset are decoded by httpx
+                charset = response.charset_encoding
+                if charset is not None and not _is_utf8(charset):
+                    return response.text
+                return response.content
+            except httpx.HTTPError as e:
+                if attempt == 2:
+                    raise e
+                logger.warning(
+                    "Failed to fetch {}: {}. Retrying...", article_url, e
+                )
+                await asyncio.sleep(0.2 * 2**attempt + random.random() * 0.2)
+
+    async def fetch_and_parse_article(
+        self, client: httpx.AsyncClient, article_url: str
+    ) -> Optional[List[Dict[str, Optional[str]]]]:
+        """
+        Fetch a single article and parse it as soon as it arrives.
+        The connection slot is held until parsing finishes and the HTML is released,
+        so at most max_connections HTML bodies are held in memory at once.
+        Parsing runs in a worker thread, so it does not block the event loop while other pages are still downloading.
 
-    async def fetch_all_articles(self, pages: int) -> List[Optional[str]]:
+        :param client: The HTTP client to use for fetching.
+        :param article_url: The URL of the article to fetch.
+        :return: The parsed article data, empty if the page holds no articles, None if it could not be parsed.
+            _END_OF_LISTING if stop_on_empty_page is set and the body is blank.
+        """
+        # Only max_connections coroutines compete for the client's connection pool at once,
+        # and fetched bodies cannot pile up waiting for a parser thread
+        async with self.semaphore:
+            article_html = await self.fetch_article(client, article_url)
+            if article_html is None:
+                return None
+            # Only a blank body marks the end of a paged listing. A page that parses to no articles
+            # (an error or consent page, changed markup) is an ordinary result and does not stop the run.
+            if self.stop_on_empty_page and not article_html.strip():
+                return _END_OF_LISTING
+            return await asyncio.to_thread(
+                self.parse_article, article_html, article_url
+            )
+
+    async def fetch_all_articles(
+        self, pages: int
+    ) -> List[Optional[List[Dict[str, Optional[str]]]]]:
         """
-        Fetch all articles across multiple pages.
+        Fetch and parse all articles across multiple pages.
 
         :param pages: The number of pages to fetch articles from.
-        :return: A list of HTML content for each article.
+        :return: A list of parsed article data for each article link, None where fetching or parsing failed.
         """
-        for page in tqdm(range(1, pages + 1), desc="Retrieving Links..."):
-            try:
-                self.construct_or_retrieve_links(page)
-            except Exception as e:
-                logger.warning(f"Failed to retrieve links from page {page}: {e}")
-                raise e
+        await self.construct_or_retrieve_all_links(pages)
+
+        client = self.get_client()
+        # Paged listings are fetched in batches of max_connections, so fetching can stop after the first blank page.
+        # Each batch is a barrier: one slow or retrying page holds up the next batch until it completes.
+        batch_size = (
+            self.max_connections
+            if self.stop_on_empty_page
+            else max(len(self.article_links), 1)
+        )
+        results = []
+        # Redraw at most once a second, so the bar does not cost a write per page
+        with tqdm(
+            total=len(self.article_links),
+            desc="Fetching Articles...",
+            disable=not self.show_progress,
+            mininterval=1.0,
+        ) as progress:
+            for start in range(0, len(self.article_links), batch_size):
+                batch = self.article_links[start : start + batch_size]
+                batch_results = await asyncio.gather(
+                    *[
+                        self.fetch_and_parse_article(client, article_url)
+                        for article_url in batch
+                    ],
+                    return_exceptions=True,
+                )
+                progress.update(len(batch))
+                results.extend(batch_results)
+                if any(result is _END_OF_LISTING for result in batch_results):
+                    logger.info(
+                        "Reached the end of the listing, skipping the remaining {} pages",
+                        len(self.article_links) - len(results),
+                    )
+                    break
 
-        async with httpx.AsyncClient() as client:
-            tasks = [
-                self.fetch_article(client, article_url)
-                for article_url in self.article_links
-            ]
-            wrapped_tasks = tqdm_asyncio.gather(*tasks, desc="Fetching Articles...")
-            return await wrapped_tasks
+        # A page that failed all retries is logged and skipped instead of aborting the whole run
+        for i, (result, article_url) in enumerate(zip(results, self.article_links)):
+            if isinstance(result, BaseException):
+                logger.error("Giving up on {}: {}", article_url, result)
+                results[i] = None
+            elif result is _END_OF_LISTING:
+                results[i] = []
+        return results
 
     async def run_async(self, pages: int = 1) -> None:
         """
@@ -101,27 +297,24 @@ class BaseFetcher(ABC):  # Inherit from ABC (Abstract Base Class)
 
         :param pages: The number of pages to fetch articles from.
         """
-        responses = await self.fetch_all_articles(pages)
-        self.articles = [
-            self.parse_article(article_html, article_url)
-            for article_html, article_url in tqdm(
-                zip(responses, self.article_links),
-                desc="Parsing Articles...",
-                total=len(self.article_links),
-            )
-            if article_html is not None
-        ]
-        # self.articles
+        try:
+            results = await self.fetch_all_articles(pages)
+        finally:
+            await self.aclose()
 
         # Filter out None values and flatten the list of lists of dictionaries into a single list of dictionaries
-        self.articles = [
-            item for sublist in self.articles if sublist is not None for item in sublist
-        ]
+        self.articles = list(chain.from_iterable(filter(None, results)))
 
 
 class EuroparlMeetingFetcher(BaseFetcher):
+    stop_on_empty_page = True
+
     def __init__(
-        self, referer_url: str, timeout: int = 10, max_connections: int = 8
+        self,
+        referer_url: str,
+        timeout: int = 10,
+        max_connections: int = 8,
+        show_progress: bool = True,
     ) -> None:
         """
         Initialize the EuroparlMeetingFetcher with a specific base URL, timeout, and maximum connections.
@@ -129,6 +322,7 @@ class EuroparlMeetingFetcher(BaseFetcher):
         :param referer_url: The referer URL for fetching articles.
         :param timeout: The timeout for HTTP requests.
         :param max_connections: The maximum number of concurrent connections.
+        :param show_progress: Whether to display a progress bar.
 
         Example usage:
         >>> fetcher = EuroparlMeetingFetcher(referer_url="https://www.europarl.europa.eu/meps/en/256864/ANDRAS+TIVADAR_KULJA/meetings/past")
@@ -139,11 +333,19 @@ class EuroparlMeetingFetcher(BaseFetcher):
             base_url="https://www.europarl.europa.eu/meps/en/loadmore-meetings",  # Base URL for fetching articles
             timeout=timeout,
             max_connections=max_connections,
+            show_progress=show_progress,
         )
 
         self.referer_url = referer_url
-        self.article_links = [referer_url]
         self.member_id = self.extract_member_id(referer_url)
+        # Only the page number changes between requests, so the rest of the query is encoded once
+        params = {
+            "meetingType": "PAST",
+            "memberId": self.member_id,
+            "termId": "10",
+            "pageSize": "10",
+        }
+        self._url_prefix = f"{self.base_url}?{urllib.parse.urlencode(params)}&page="
 
     @staticmethod
     def extract_member_id(referer_url) -> str:
@@ -163,7 +365,7 @@ class EuroparlMeetingFetcher(BaseFetcher):
         https://www.europarl.europa.eu/meps/en/256864/ANDRAS+TIVADAR_KULJA/meetings/past
         The member ID is 256864.
         """
-        match = re.search(r"/(\d+)/", referer_url)
+        match = _MEMBER_ID_RE.search(referer_url)
         if match:
             return match.group(1)
         else:
@@ -172,111 +374,66 @@ class EuroparlMeetingFetcher(BaseFetcher):
     def construct_or_retrieve_links(self, page: int) -> None:
         """
         Here, we construct links to the HTML table responses.
-        We utilize urllib.parse.urlencode to encode the parameters and append them to the base URL.
+        The page number is appended to the prefix encoded in __init__; digits need no further encoding.
         We store them in a list in self.article_links.
 
         :param page: The page number to construct links for.
         """
-        params = {
-            "meetingType": "PAST",
-            "memberId": self.member_id,
-            "termId": "10",
-            "page": str(page),
-            "pageSize": "10",
-        }
-        constructed_url = f"{self.base_url}?{urllib.parse.urlencode(params)}"
-        self.article_links.append(constructed_url)
+        self.article_links.append(self._url_prefix + str(page))
+
+    async def construct_or_retrieve_all_links(self, pages: int) -> None:
+        """
+        Build the links of all pages in one synchronous pass.
+        Link construction is pure string building, so the concurrent default would only add task and thread overhead.
+        The referer page itself is not fetched: it is a full HTML page, not a meetings table.
+
+        :param pages: The number of pages to construct links for.
+        """
+        self.article_links = []
+        for page in range(1, pages + 1):
+            self.construct_or_retrieve_links(page)
 
     def parse_article(
-        self, article_html: str, article_url: str
-    ) -> Optional[Dict[str, Optional[str]]]:
+        self, article_html: Union[bytes, str], article_url: str
+    ) -> Optional[List[Dict[str, Optional[str]]]]:
         """
         Parse a page.
 
-        :param article_html: The HTML content of the page.
+        :param article_html: The HTML content of the page: raw UTF-8 bytes, or text already decoded by fetch_article.
         :param article_url: The URL of the page.
-        :return: A dictionary containing parsed page data.
+        :return: A list of dictionaries containing parsed page data.
+            An empty list if the page holds no meetings, None if it could not be parsed.
         """
-        if len(article_html.strip()) == 0:
-            return None
+        if not article_html or not article_html.strip():
+            return []
         try:
-            page = int(re.search(r"page=(\d+)", article_url).group(1))
+            page = int(_PAGE_RE.search(article_url).group(1))
         except Exception:
             page = 0
 
         try:
             meetings = []
-            soup = BeautifulSoup(article_html, "html.parser")
-            headers = soup.select(".erpl_document-header")
-            for header in headers:
-                record = {}
-                try:
-                    record["Title"] = header.select_one(".t-item").get_text()
-                except Exception as e:
-                    logger.warning(f"Failed to retrieve title: {e}")
-                    record["Title"] = None
-
-                try:
-                    record["Date"] = header.select_one("time").get("datetime")
-                except Exception as e:
-                    logger.warning(f"Failed to retrieve date: {e}")
-                    record["Date"] = None
-
-                try:
-                    record["Place"] = header.select_one(
-                        ".erpl_document-subtitle-location"
-                    ).get_text()
-                except Exception as e:
-                    logger.warning(f"Failed to retrieve place: {e}")
-                    record["Place"] = None
-
-                try:
-                    record["Capacity"] = (
-                        header.select_one(".erpl_document-subtitle-capacity")
-                        .get_text()
-                        .strip()
-                        .replace("\n", " - ")
-                    )
-                except Exception as e:
-                    logger.warning(f"Failed to retrieve capacity: {e}")
-                    record["Capacity"] = None
-
-                try:
-                    record["Code of associated committee or delegation"] = (
-                        header.select_one(".erpl_badge-committee")
-                        .get_text()
-                        .strip()
-                        .replace("\n", " - ")
-                    )
-                except Exception as e:
-                    logger.warning(f"Failed to retrieve code: {e}")
-                    record["Code of associated committee or delegation"] = None
-
-                try:
-                    record["Meeting with"] = (
-                        header.select_one(".erpl_document-subtitle-author")
-                        .get_text()
-                        .strip()
-                        .replace("\n", " - ")
-                    )
-                except Exception as e:
-                    logger.warning(f"Failed to retrieve meeting: {e}")
-                    record["Meeting with"] = None
-
-                record["page_number"] = page
+            tree = LexborHTMLParser(article_html)
+            for header in tree.css(".erpl_document-header"):
+                record = {
+                    "Title": _first_text(header, ".t-item"),
+                    "Date": _first_text(header, "time", attribute="datetime"),
+                    "Place": _first_text(header, ".erpl_document-subtitle-location"),
+                    "Capacity": _first_text(
+                        header, ".erpl_document-subtitle-capacity", clean=True
+                    ),
+                    "Code of associated committee or delegation": _first_text(
+                        header, ".erpl_badge-committee", clean=True
+                    ),
+                    "Meeting with": _first_text(
+                        header, ".erpl_document-subtitle-author", clean=True
+                    ),
+                    "page_number": page,
+                }
                 meetings.append(record)
 
             return meetings
         except Exception as e:
-            logger.error(f"Failed to parse page: {article_url}: {e}")
+            logger.error("Failed to parse page: {}: {}", article_url, e)
             return None
 
-
-# %%
-response = httpx.get(
-    "https://www.europarl.europa.eu/meps/en/loadmore-meetings?meetingType=PAST&memberId=256864&termId=10&page=1000&pageSize=10"
-)  # %%
-response.status_code
-# %%
-response.content
-# %%